@@ -1,36 +1,169 @@
+import asyncio
+import httpx
+import msgpack
+import numpy as np
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import NamedTuple, Optional
 from datetime import datetime # Import datetime for date/time conversion
 
 # Base URL for the GIOŚ API. This is the corrected base URL for the 'pjp-api/rest' services.
 GIOS_API_BASE_URL = "https://api.gios.gov.pl/pjp-api/rest"
 
+logger = logging.getLogger(__name__)
+
+# Shared HTTP session, so that all fetch_* calls reuse keep-alive connections
+# to api.gios.gov.pl instead of doing a new TCP+TLS handshake for every request.
+# Transient failures (connection errors, 429 and 5xx responses) are retried with
+# exponential backoff, so a single blip does not fail a whole batch of fetches.
+_RETRY = Retry(total=3, backoff_factor=0.5,
+               status_forcelist=(429, 500, 502, 503, 504),
+               allowed_methods=frozenset(["GET"]))
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(max_retries=_RETRY, pool_connections=4, pool_maxsize=32))
+# GIOŚ responses are verbose JSON, so always ask for a compressed body;
+# requests decompresses it transparently before _parse_json sees it.
+_REQUEST_HEADERS = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+_SESSION.headers.update(_REQUEST_HEADERS)
+
+# On-disk cache of slowly changing API responses. The station catalog practically
+# never changes during a day, sensor lists change very rarely. Entries are stored
+# as msgpack, which decodes faster than JSON and round-trips plain lists/dicts.
+_CACHE_DIR = Path("~/.cache").expanduser()
+_STATIONS_CACHE = _CACHE_DIR / "gios_stations.msgpack"
+_STATIONS_TTL = 6 * 3600 # seconds
+_SENSORS_TTL = 10 * 60 # seconds
+
+def _sensors_cache_path(station_id):
+    return _CACHE_DIR / f"gios_sensors_{station_id}.msgpack"
+
+def _cache_is_fresh(path, ttl):
+    """
+    Returns True if the cache file exists and is younger than ttl seconds.
+    """
+    try:
+        return time.time() - path.stat().st_mtime < ttl
+    except OSError:
+        return False
+
+def _read_cache(path, ttl=None):
+    """
+    Returns the data stored in the cache file, or None if the file
+    does not exist, is older than ttl seconds or cannot be read.
+    With ttl=None the file is returned regardless of its age.
+    """
+    if ttl is not None and not _cache_is_fresh(path, ttl):
+        return None
+    try:
+        return msgpack.unpackb(path.read_bytes())
+    except (OSError, ValueError, msgpack.UnpackException):
+        return None
+
+def _parse_json(response):
+    """
+    Parses the JSON body of a requests response with orjson, which is several times
+    faster than the standard json module used by response.json() on large payloads.
+    Raises orjson.JSONDecodeError if the body is not valid JSON.
+    """
+    return orjson.loads(response.content)
+
+def _write_cache(path, data):
+    """
+    Stores data (plain lists/dicts as decoded from the API) in the cache file. A failure
+    to write the cache is not an error for the caller, the data was already fetched.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(msgpack.packb(data))
+    except OSError as e:
+        logger.warning(f"Nie udało się zapisać pamięci podręcznej {path}: {e}")
+
 def fetch_stations():
     """
     Fetches a list of all available air quality measurement stations from the GIOŚ API.
 
     The API endpoint used is: https://api.gios.gov.pl/pjp-api/rest/station/findAll
 
+    The response is cached on disk for _STATIONS_TTL seconds, so warm starts
+    do not download the whole station catalog again. Once the cache is stale, the
+    request is made conditional on the cached ETag / Last-Modified; if the catalog
+    has not changed the server answers 304 without a body and the cache is reused.
+
     Returns:
         list: A list of dictionaries, where each dictionary represents a station
               and contains its details (e.g., id, stationName, address, geographical coordinates).
               Returns None if there's an error during the API call.
     """
+    # Cache entry format: {'etag': ..., 'last_modified': ..., 'body': [stations]}
+    cached = _read_cache(_STATIONS_CACHE)
+    if not isinstance(cached, dict):
+        cached = None # Missing or corrupted cache
+    if cached is not None and _cache_is_fresh(_STATIONS_CACHE, _STATIONS_TTL):
+        return cached['body']
+
+    headers = {}
+    if cached is not None:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
     url = f"{GIOS_API_BASE_URL}/station/findAll"
     try:
         # Send an HTTP GET request to the /station/findAll endpoint
-        response = requests.get(url, timeout=10) # Added a timeout for robustness
+        response = _SESSION.get(url, headers=headers, timeout=10) # Added a timeout for robustness
         
         # Raise an HTTPError for bad responses (4xx or 5xx status codes)
         response.raise_for_status() 
+
+        if response.status_code == 304 and cached is not None:
+            # Not modified: the cached catalog is still valid, restart its TTL
+            try:
+                _STATIONS_CACHE.touch()
+            except OSError:
+                pass
+            return cached['body']
         
-        # Parse the JSON response body and return it
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        # Parse the JSON response body, cache it and return it
+        stations = _parse_json(response)
+        _write_cache(_STATIONS_CACHE, {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body': stations,
+        })
+        return stations
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         # Catch any request-related errors (e.g., network issues, timeouts, HTTP errors)
-        print(f"Błąd pobierania stacji z GIOŚ API: {e}")
+        logger.error(f"Błąd pobierania stacji z GIOŚ API: {e}")
         return None
 
+@lru_cache(maxsize=512)
+def _fetch_sensors_cached(station_id):
+    """
+    Fetches the sensor list for a station (disk cache first, then the API) and memoizes
+    it in-process. Request errors are raised, not returned, so that failures are never cached.
+    """
+    cache_path = _sensors_cache_path(station_id)
+    cached = _read_cache(cache_path, _SENSORS_TTL)
+    if cached is not None:
+        return tuple(cached)
+
+    url = f"{GIOS_API_BASE_URL}/station/sensors/{station_id}"
+    response = _SESSION.get(url, timeout=10)
+    response.raise_for_status()
+    sensors = _parse_json(response)
+    _write_cache(cache_path, sensors)
+    return tuple(sensors)
+
 def fetch_sensors_for_station(station_id):
     """
     Fetches a list of sensors (measurement positions) for a given air quality station ID
@@ -38,6 +171,11 @@ def fetch_sensors_for_station(station_id):
 
     The API endpoint used is: https://api.gios.gov.pl/pjp-api/rest/station/sensors/{station_id}
 
+    The response is cached on disk per station for _SENSORS_TTL seconds and memoized
+    in-process, so repeated calls for the same station do not hit the network.
+    The returned list is a fresh copy, but the sensor dictionaries inside it are shared
+    between calls and must not be modified.
+
     Args:
         station_id (int): The unique identifier of the air quality station.
 
@@ -46,21 +184,33 @@ def fetch_sensors_for_station(station_id):
               and contains its details (e.g., id, stationId, param details).
               Returns None if there's an error during the API call.
     """
-    url = f"{GIOS_API_BASE_URL}/station/sensors/{station_id}"
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Błąd pobierania sensorów dla stacji {station_id} z GIOŚ API: {e}")
+        return list(_fetch_sensors_cached(station_id))
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error(f"Błąd pobierania sensorów dla stacji {station_id} z GIOŚ API: {e}")
         return None
 
+@lru_cache(maxsize=64)
+def _fetch_measurements_cached(sensor_id, hour_bucket):
+    """
+    Fetches measurement data for a sensor and memoizes it in-process. GIOŚ publishes
+    new measurements hourly, so hour_bucket (hours since the epoch) is part of the key
+    and makes the entry expire. Request errors are raised, so failures are never cached.
+    """
+    url = f"{GIOS_API_BASE_URL}/data/getData/{sensor_id}"
+    response = _SESSION.get(url, timeout=10)
+    response.raise_for_status()
+    return _parse_json(response)
+
 def fetch_measurements_for_sensor(sensor_id):
     """
     Fetches specific measurement data for a given sensor ID from the GIOŚ API.
 
     The API endpoint used is: https://api.gios.gov.pl/pjp-api/rest/data/getData/{sensor_id}
 
+    The response is memoized in-process within the current hour. The returned dictionary
+    is shared between calls and must not be modified.
+
     Args:
         sensor_id (int): The unique identifier of the measurement sensor.
 
@@ -69,68 +219,306 @@ def fetch_measurements_for_sensor(sensor_id):
               and 'values' (a list of dictionaries, each with 'date' and 'value').
               Returns None if there's an error during the API call.
     """
-    url = f"{GIOS_API_BASE_URL}/data/getData/{sensor_id}"
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Błąd pobierania pomiarów dla sensora {sensor_id} z GIOŚ API: {e}")
+        return _fetch_measurements_cached(sensor_id, int(time.time() // 3600))
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error(f"Błąd pobierania pomiarów dla sensora {sensor_id} z GIOŚ API: {e}")
         return None
 
-def process_measurement_data(raw_measurements_data):
+def fetch_measurements_bulk(sensor_ids, max_workers=8):
     """
-    Processes raw measurement data fetched from the GIOŚ API.
-    Converts 'date' strings to datetime objects and 'value' strings to floats.
-    Handles 'null' values for 'value' by converting them to None.
+    Fetches measurement data for many sensors concurrently, using a thread pool that
+    shares the keep-alive connections of the module-level session.
 
     Args:
-        raw_measurements_data (dict): The dictionary returned by fetch_measurements_for_sensor.
-                                      Expected format: {'key': 'PARAM_CODE', 'values': [{'date': '...', 'value': '...'}, ...]}
+        sensor_ids (list): Unique identifiers of the measurement sensors.
+        max_workers (int): Number of concurrent requests. Values above the session's
+                           connection pool size (32) do not add parallelism.
 
     Returns:
-        dict: A processed dictionary with 'values' containing dictionaries where 'date' is a datetime object
-              and 'value' is a float or None. Returns None if the input is invalid or essential keys are missing.
+        dict: Maps each sensor ID to the result of fetch_measurements_for_sensor
+              (the raw measurement data, or None if it could not be fetched).
     """
-    if not raw_measurements_data or 'values' not in raw_measurements_data:
-        print("Błąd: Nieprawidłowe dane pomiarowe do przetworzenia.")
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_measurements_for_sensor, sensor_id): sensor_id
+                   for sensor_id in sensor_ids}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+async def _get_json(client, url):
+    """
+    Sends a GET request on the given httpx client and returns the parsed JSON body.
+    Raises httpx.HTTPError if the request fails and orjson.JSONDecodeError
+    if the body is not valid JSON.
+    """
+    response = await client.get(url)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+async def async_fetch_sensors_for_station(client, station_id):
+    """
+    Asynchronous counterpart of fetch_sensors_for_station, using a shared httpx client.
+
+    Args:
+        client (httpx.AsyncClient): The client used to send the request.
+        station_id (int): The unique identifier of the air quality station.
+
+    Returns:
+        list: A list of sensor dictionaries, or None if there's an error during the API call.
+    """
+    url = f"{GIOS_API_BASE_URL}/station/sensors/{station_id}"
+    try:
+        return await _get_json(client, url)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        logger.error(f"Błąd pobierania sensorów dla stacji {station_id} z GIOŚ API: {e}")
         return None
 
-    processed_data = {'key': raw_measurements_data.get('key')}
-    processed_values = []
+async def async_fetch_measurements_for_sensor(client, sensor_id):
+    """
+    Asynchronous counterpart of fetch_measurements_for_sensor, using a shared httpx client.
 
-    for item in raw_measurements_data.get('values', []):
-        date_str = item.get('date')
-        value_str = item.get('value')
+    Args:
+        client (httpx.AsyncClient): The client used to send the request.
+        sensor_id (int): The unique identifier of the measurement sensor.
+
+    Returns:
+        dict: The raw measurement data ('key' and 'values'), or None if there's an error during the API call.
+    """
+    url = f"{GIOS_API_BASE_URL}/data/getData/{sensor_id}"
+    try:
+        return await _get_json(client, url)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        logger.error(f"Błąd pobierania pomiarów dla sensora {sensor_id} z GIOŚ API: {e}")
+        return None
+
+def _async_client():
+    """
+    Creates the client for concurrent fetches. With HTTP/2 all requests are multiplexed
+    as parallel streams over a single TLS connection, without head-of-line blocking.
+    """
+    return httpx.AsyncClient(http2=True, timeout=10.0, headers=_REQUEST_HEADERS,
+                             limits=httpx.Limits(max_connections=16, max_keepalive_connections=4))
+
+async def async_fetch_station_full(client, station_id):
+    """
+    Fetches the sensors of a station and then, as soon as the sensor list arrives,
+    the measurements of all its sensors concurrently. The whole station takes about
+    two round-trips instead of one per sensor.
+
+    Args:
+        client (httpx.AsyncClient): The client used to send the requests.
+        station_id (int): The unique identifier of the air quality station.
+
+    Returns:
+        tuple: (sensors, measurements), where sensors is the list of sensor dictionaries and
+               measurements maps each sensor ID to its raw measurement data (None if it could
+               not be fetched). Returns (None, None) if the sensors could not be fetched.
+    """
+    sensors = await async_fetch_sensors_for_station(client, station_id)
+    if sensors is None:
+        return None, None
+
+    sensor_ids = [sensor['id'] for sensor in sensors]
+    measurements = await asyncio.gather(
+        *[async_fetch_measurements_for_sensor(client, sensor_id) for sensor_id in sensor_ids])
+    return sensors, dict(zip(sensor_ids, measurements))
+
+async def _fetch_station_full_async(station_id):
+    async with _async_client() as client:
+        return await async_fetch_station_full(client, station_id)
+
+def fetch_station_full(station_id):
+    """
+    Synchronous wrapper around async_fetch_station_full, for callers that need
+    the sensors and all their measurements of a single station.
+
+    Args:
+        station_id (int): The unique identifier of the air quality station.
+
+    Returns:
+        tuple: (sensors, measurements) as returned by async_fetch_station_full.
+    """
+    return asyncio.run(_fetch_station_full_async(station_id))
+
+async def _fetch_all_measurements_async(station_ids):
+    async with _async_client() as client:
+        # Every station starts fetching its measurements as soon as its own sensor
+        # list arrives, instead of waiting for the sensor lists of all stations
+        results = await asyncio.gather(
+            *[async_fetch_station_full(client, station_id) for station_id in station_ids])
+
+    return {station_id: measurements
+            for station_id, (_, measurements) in zip(station_ids, results)}
+
+def fetch_all_measurements(station_ids):
+    """
+    Fetches raw measurement data for all sensors of the given stations, issuing
+    the requests concurrently instead of one round-trip at a time.
+
+    Args:
+        station_ids (list): Unique identifiers of the air quality stations.
+
+    Returns:
+        dict: Maps each station ID to a dictionary of {sensor_id: raw measurement data}.
+              A station maps to None if its sensors could not be fetched, and a sensor
+              maps to None if its measurements could not be fetched.
+    """
+    return asyncio.run(_fetch_all_measurements_async(list(station_ids)))
+
+class Measurement(NamedTuple):
+    """
+    A single processed measurement. A compact tuple instead of a per-row dictionary;
+    fields are accessed as m.date and m.value.
+    """
+    date: Optional[datetime]
+    value: Optional[float]
+
+# Timestamp format used by the GIOŚ API, and strptime bound once at module level
+_DATE_FMT = '%Y-%m-%d %H:%M:%S'
+_STRPTIME = datetime.strptime
+
+# Extracts both fields of a raw measurement entry in a single C-level call
+_DATE_AND_VALUE = itemgetter('date', 'value')
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str):
+    """
+    Parses a GIOŚ timestamp in the 'YYYY-MM-DD HH:MM:SS' format into a datetime.
+    Slicing the fixed-width string is much faster than datetime.strptime, and since
+    all sensors report the same hourly timestamps, the results are memoized.
+    Strings that are not fixed-width (e.g. without zero padding) fall back to strptime.
+    Raises ValueError if the string does not have this format.
+    """
+    if len(date_str) != 19 or date_str[4] != '-' or date_str[7] != '-' or date_str[10] != ' ' \
+            or date_str[13] != ':' or date_str[16] != ':':
+        return _STRPTIME(date_str, _DATE_FMT)
+    return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                    int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]))
+
+def _parse_measurement_values(values):
+    """
+    Converts the raw 'values' entries of a measurement payload in a single pass.
+    Returns two parallel lists: datetimes and floats, with None where the entry
+    is missing or invalid. Malformed entries are reported in one summary warning.
+    """
+    dates = [None] * len(values)
+    parsed_values = [None] * len(values)
+    bad_dates = 0
+    bad_values = 0
+    parse_date = _parse_date # Local name, avoids a global lookup per row
+    date_and_value = _DATE_AND_VALUE
+
+    for i, item in enumerate(values):
+        try:
+            date_str, value_str = date_and_value(item)
+        except KeyError:
+            # Entries from the API always have both keys, this is only a fallback
+            date_str = item.get('date')
+            value_str = item.get('value')
 
         # Convert date string to datetime object
         parsed_date = None
         if date_str:
             try:
-                parsed_date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                print(f"Ostrzeżenie: Nieprawidłowy format daty: {date_str}")
+                parsed_date = parse_date(date_str)
+            except (ValueError, TypeError):
+                bad_dates += 1
                 parsed_date = None # Keep it None if parsing fails
 
         # Convert value string to float, handling 'null'
         parsed_value = None
-        if value_str is not None: # Check for actual None from JSON (Python's None)
+        if type(value_str) is float:
+            # The JSON decoder already produced a float, which is the common case
+            parsed_value = value_str
+        elif value_str is not None: # Check for actual None from JSON (Python's None)
             try:
                 parsed_value = float(value_str)
             except (ValueError, TypeError):
-                print(f"Ostrzeżenie: Nieprawidłowa wartość liczbowa: {value_str}")
+                bad_values += 1
                 parsed_value = None # Keep it None if conversion fails
         
-        # If value_str was "null" from JSON, it will already be None in Python due to json.loads()
+        # If value_str was "null" from JSON, it will already be None in Python due to orjson.loads()
 
-        processed_values.append({
-            'date': parsed_date,
-            'value': parsed_value
-        })
-    
-    processed_data['values'] = processed_values
-    return processed_data
+        dates[i] = parsed_date
+        parsed_values[i] = parsed_value
+
+    if bad_dates or bad_values:
+        # One summary instead of a line per malformed row, which is costly on noisy data
+        logger.warning(f"Nieprawidłowe dane pomiarowe zastąpiono przez None: "
+                       f"daty: {bad_dates}, wartości liczbowe: {bad_values}.")
+
+    return dates, parsed_values
+
+def process_measurement_data(raw_measurements_data):
+    """
+    Processes raw measurement data fetched from the GIOŚ API.
+    Converts 'date' strings to datetime objects and 'value' strings to floats.
+    Handles 'null' values for 'value' by converting them to None.
+
+    Args:
+        raw_measurements_data (dict): The dictionary returned by fetch_measurements_for_sensor.
+                                      Expected format: {'key': 'PARAM_CODE', 'values': [{'date': '...', 'value': '...'}, ...]}
+
+    Returns:
+        dict: A processed dictionary with 'values' containing Measurement tuples where 'date' is a datetime object
+              (or None) and 'value' is a float or None. Returns None if the input is invalid or essential keys are missing.
+    """
+    if not raw_measurements_data or 'values' not in raw_measurements_data:
+        logger.error("Nieprawidłowe dane pomiarowe do przetworzenia.")
+        return None
+
+    dates, parsed_values = _parse_measurement_values(raw_measurements_data['values'] or [])
+    return {
+        'key': raw_measurements_data.get('key'),
+        'values': list(map(Measurement, dates, parsed_values)),
+    }
+
+def process_measurement_data_np(raw_measurements_data):
+    """
+    Processes raw measurement data straight into NumPy arrays, without building
+    a Measurement row per entry first. Meant for consumers such as matplotlib or
+    NumPy aggregations, which would convert the rows back into arrays anyway
+    (e.g. ax.plot(dates, values) or np.nanmean(values)).
+
+    Args:
+        raw_measurements_data (dict): The dictionary returned by fetch_measurements_for_sensor.
+
+    Returns:
+        tuple: (key, dates, values), where key is the parameter code, dates is a datetime64[s]
+               array (NaT for missing or invalid dates) and values is a float64 array (NaN for
+               missing or invalid values). Returns None if the input is invalid or essential keys are missing.
+    """
+    if not raw_measurements_data or 'values' not in raw_measurements_data:
+        logger.error("Nieprawidłowe dane pomiarowe do przetworzenia.")
+        return None
+
+    dates, parsed_values = _parse_measurement_values(raw_measurements_data['values'] or [])
+    return (raw_measurements_data.get('key'),
+            np.array(dates, dtype='datetime64[s]'),
+            np.array(parsed_values, dtype='float64'))
+
+def process_measurement_data_columnar(raw_measurements_data):
+    """
+    Processes raw measurement data like process_measurement_data, but returns it in
+    columnar form: one NumPy array of dates and one of values. This is much more compact
+    than a list of rows and can be fed directly to NumPy/matplotlib (e.g. np.nanmean(values)).
+
+    Args:
+        raw_measurements_data (dict): The dictionary returned by fetch_measurements_for_sensor.
+
+    Returns:
+        dict: A dictionary with 'key' (parameter code), 'dates' (a datetime64[s] array, NaT for
+              missing or invalid dates) and 'values' (a float64 array, NaN for missing or invalid
+              values). Returns None if the input is invalid or essential keys are missing.
+    """
+    processed_data = process_measurement_data_np(raw_measurements_data)
+    if processed_data is None:
+        return None
 
+    key, dates, values = processed_data
+    return {'key': key, 'dates': dates, 'values': values}
 
 # Example usage (for testing this module independently if desired):
 if __name__ == "__main__":
@@ -178,7 +566,7 @@ if __name__ == "__main__":
                             print(f"\nPobrano i przetworzono dane pomiarowe dla sensora {sample_sensor_id}. Klucz: {processed_measurements.get('key')}")
                             print("Przetworzone dane (pierwsze 5 wpisów):")
                             for entry in processed_measurements.get('values', [])[:5]:
-                                print(f"  Data: {entry['date']}, Wartość: {entry['value']}")
+                                print(f"  Data: {entry.date}, Wartość: {entry.value}")
                             print("--- Koniec pierwszych 5 pomiarów ---")
                         else:
                             print(f"Nie udało się przetworzyć danych pomiarowych dla sensora {sample_sensor_id}.")